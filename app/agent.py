@@ -16,6 +16,5 @@ class Agent:
         self.system_prompt = prompt
 
     def build_messages(self):
-        return [
-            {"role": m["role"], "content": m["content"]} for m in self.current_convo
-        ]
+        # current_convo is already kept in wire format by add_message
+        return self.current_convo
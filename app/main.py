@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sse_starlette.sse import EventSourceResponse
 from datetime import datetime
 import json
@@ -17,6 +18,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Fields of a stored Message that the LLM API understands
+_LLM_FIELDS = {"role", "content"}
+
+
+def to_llm_messages(messages: list[Message]) -> list[dict]:
+    """Serialize stored messages into the wire format expected by the LLM"""
+    return [m.model_dump(include=_LLM_FIELDS) for m in messages]
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, Set[WebSocket]] = {}
@@ -106,7 +115,7 @@ async def websocket_error_handler(websocket: WebSocket, chat_id: str, manager: C
             # Always ensure we disconnect on error
             manager.disconnect(websocket, chat_id)
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 app.debug = True  # Set to False in production
 settings = get_settings()
 db = Database(settings.database_url)
@@ -152,7 +161,7 @@ async def get_conversation(chat_id: str):
 async def stream_response(chat_id: str):
     complete_response = ""
     conversation = db.load_conversation(chat_id)
-    messages_for_llm = [{"role": m.role, "content": m.content} for m in conversation.messages]
+    messages_for_llm = to_llm_messages(conversation.messages)
     
     async for chunk in llm.stream_chat(messages_for_llm):
         complete_response += chunk
@@ -289,7 +298,7 @@ async def websocket_endpoint(websocket: WebSocket):
 
                     # Stream the response
                     complete_response = ""
-                    messages_for_llm = [{"role": m.role, "content": m.content} for m in conversation.messages]
+                    messages_for_llm = to_llm_messages(conversation.messages)
                     
                     async for chunk in llm.stream_chat(messages_for_llm):
                         complete_response += chunk
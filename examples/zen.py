@@ -1,17 +1,28 @@
 from standardbackend.helpers.thread import Thread
 from standardbackend.utils import pretty_print_messages
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import cache, partial
+from typing import List
 import logging
+import sys
+import numpy as np
 
-# Configure logging to print to stdout with colors
-logging.basicConfig(
-    level=logging.INFO,
-    format="\033[36m%(asctime)s\033[0m - \033[32m%(name)s\033[0m - \033[1;33m%(levelname)s\033[0m - %(message)s",
-)
+_COLOR_FORMAT = "\033[36m%(asctime)s\033[0m - \033[32m%(name)s\033[0m - \033[1;33m%(levelname)s\033[0m - %(message)s"
+_PLAIN_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 
+def _configure_logging():
+    """Log INFO and up to stderr, in color only when it is a terminal"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=_COLOR_FORMAT if sys.stderr.isatty() else _PLAIN_FORMAT,
+    )
+
+
 # # Chain of tool interactions
 # analysis_thread = Thread()
 # messages = analysis_thread.send_message("What's my current CPU usage? Use the tool!")
@@ -22,271 +33,416 @@ logger = logging.getLogger(__name__)
 # pretty_print_messages(messages)
 
 
+# Customer fields get_user can look up by
+_ALLOWED_KEYS = frozenset({"email", "phone", "username"})
+
+# cancel_order's answer for orders past "Processing", by status
+_SHIPPED_REFUSAL = "Order has already shipped.  Can't cancel it."
+_CANCEL_REFUSALS = {
+    "Shipped": _SHIPPED_REFUSAL,
+    "Delivered": _SHIPPED_REFUSAL,
+    "Cancelled": "Order is already cancelled.",
+}
+
+
+@dataclass(slots=True, frozen=True)
+class Customer:
+    id: str
+    name: str
+    email: str
+    phone: str
+    username: str
+
+
+@dataclass(slots=True)
+class Order:
+    id: str
+    customer_id: str
+    product: str
+    quantity: int
+    price: float
+    status: str
+
+    def __post_init__(self):
+        # Some rows carry numbers as strings; coerce once so readers don't have to
+        self.price = float(self.price)
+        self.quantity = int(self.quantity)
+
+
+# Demo data. Customers are immutable and shared by every FakeDatabase;
+# orders change (cancel_order), so each instance builds its own from the rows.
+_CUSTOMERS = tuple(
+    Customer(**row)
+    for row in (
+        {
+            "id": "1213210",
+            "name": "John Doe",
+            "email": "john@gmail.com",
+            "phone": "123-456-7890",
+            "username": "johndoe",
+        },
+        {
+            "id": "2837622",
+            "name": "Priya Patel",
+            "email": "priya@candy.com",
+            "phone": "987-654-3210",
+            "username": "priya123",
+        },
+        {
+            "id": "3924156",
+            "name": "Liam Nguyen",
+            "email": "lnguyen@yahoo.com",
+            "phone": "555-123-4567",
+            "username": "liamn",
+        },
+        {
+            "id": "4782901",
+            "name": "Aaliyah Davis",
+            "email": "aaliyahd@hotmail.com",
+            "phone": "111-222-3333",
+            "username": "adavis",
+        },
+        {
+            "id": "5190753",
+            "name": "Hiroshi Nakamura",
+            "email": "hiroshi@gmail.com",
+            "phone": "444-555-6666",
+            "username": "hiroshin",
+        },
+        {
+            "id": "6824095",
+            "name": "Fatima Ahmed",
+            "email": "fatimaa@outlook.com",
+            "phone": "777-888-9999",
+            "username": "fatimaahmed",
+        },
+        {
+            "id": "7135680",
+            "name": "Alejandro Rodriguez",
+            "email": "arodriguez@protonmail.com",
+            "phone": "222-333-4444",
+            "username": "alexr",
+        },
+        {
+            "id": "8259147",
+            "name": "Megan Anderson",
+            "email": "megana@gmail.com",
+            "phone": "666-777-8888",
+            "username": "manderson",
+        },
+        {
+            "id": "9603481",
+            "name": "Kwame Osei",
+            "email": "kwameo@yahoo.com",
+            "phone": "999-000-1111",
+            "username": "kwameo",
+        },
+        {
+            "id": "1057426",
+            "name": "Mei Lin",
+            "email": "meilin@gmail.com",
+            "phone": "333-444-5555",
+            "username": "mlin",
+        },
+    )
+)
+
+_ORDERS_RAW = (
+    {
+        "id": "24601",
+        "customer_id": "1213210",
+        "product": "Wireless Headphones",
+        "quantity": 1,
+        "price": 79.99,
+        "status": "Shipped",
+    },
+    {
+        "id": "13579",
+        "customer_id": "1213210",
+        "product": "Smartphone Case",
+        "quantity": 2,
+        "price": 19.99,
+        "status": "Processing",
+    },
+    {
+        "id": "97531",
+        "customer_id": "2837622",
+        "product": "Bluetooth Speaker",
+        "quantity": 1,
+        "price": "49.99",
+        "status": "Shipped",
+    },
+    {
+        "id": "86420",
+        "customer_id": "3924156",
+        "product": "Fitness Tracker",
+        "quantity": 1,
+        "price": 129.99,
+        "status": "Delivered",
+    },
+    {
+        "id": "54321",
+        "customer_id": "4782901",
+        "product": "Laptop Sleeve",
+        "quantity": 3,
+        "price": 24.99,
+        "status": "Shipped",
+    },
+    {
+        "id": "19283",
+        "customer_id": "5190753",
+        "product": "Wireless Mouse",
+        "quantity": 1,
+        "price": 34.99,
+        "status": "Processing",
+    },
+    {
+        "id": "74651",
+        "customer_id": "6824095",
+        "product": "Gaming Keyboard",
+        "quantity": 1,
+        "price": 89.99,
+        "status": "Delivered",
+    },
+    {
+        "id": "30298",
+        "customer_id": "7135680",
+        "product": "Portable Charger",
+        "quantity": 2,
+        "price": 29.99,
+        "status": "Shipped",
+    },
+    {
+        "id": "47652",
+        "customer_id": "8259147",
+        "product": "Smartwatch",
+        "quantity": 1,
+        "price": 199.99,
+        "status": "Processing",
+    },
+    {
+        "id": "61984",
+        "customer_id": "9603481",
+        "product": "Noise-Cancelling Headphones",
+        "quantity": 1,
+        "price": 149.99,
+        "status": "Shipped",
+    },
+    {
+        "id": "58243",
+        "customer_id": "1057426",
+        "product": "Wireless Earbuds",
+        "quantity": 2,
+        "price": 99.99,
+        "status": "Delivered",
+    },
+    {
+        "id": "90357",
+        "customer_id": "1213210",
+        "product": "Smartphone Case",
+        "quantity": 1,
+        "price": 19.99,
+        "status": "Shipped",
+    },
+    {
+        "id": "28164",
+        "customer_id": "2837622",
+        "product": "Wireless Headphones",
+        "quantity": 2,
+        "price": 79.99,
+        "status": "Processing",
+    },
+)
+
+
+def _user_getter(key, index):
+    """A get_user specialized to one key: a single dict probe per call"""
+
+    def get(value):
+        user = index.get(value)
+        if user is None:
+            return f"Couldn't find a user with {key} of {value}"
+        return user
+
+    return get
+
+
 class FakeDatabase:
     def __init__(self):
-        self.customers = [
-            {
-                "id": "1213210",
-                "name": "John Doe",
-                "email": "john@gmail.com",
-                "phone": "123-456-7890",
-                "username": "johndoe",
-            },
-            {
-                "id": "2837622",
-                "name": "Priya Patel",
-                "email": "priya@candy.com",
-                "phone": "987-654-3210",
-                "username": "priya123",
-            },
-            {
-                "id": "3924156",
-                "name": "Liam Nguyen",
-                "email": "lnguyen@yahoo.com",
-                "phone": "555-123-4567",
-                "username": "liamn",
-            },
-            {
-                "id": "4782901",
-                "name": "Aaliyah Davis",
-                "email": "aaliyahd@hotmail.com",
-                "phone": "111-222-3333",
-                "username": "adavis",
-            },
-            {
-                "id": "5190753",
-                "name": "Hiroshi Nakamura",
-                "email": "hiroshi@gmail.com",
-                "phone": "444-555-6666",
-                "username": "hiroshin",
-            },
-            {
-                "id": "6824095",
-                "name": "Fatima Ahmed",
-                "email": "fatimaa@outlook.com",
-                "phone": "777-888-9999",
-                "username": "fatimaahmed",
-            },
-            {
-                "id": "7135680",
-                "name": "Alejandro Rodriguez",
-                "email": "arodriguez@protonmail.com",
-                "phone": "222-333-4444",
-                "username": "alexr",
-            },
-            {
-                "id": "8259147",
-                "name": "Megan Anderson",
-                "email": "megana@gmail.com",
-                "phone": "666-777-8888",
-                "username": "manderson",
-            },
-            {
-                "id": "9603481",
-                "name": "Kwame Osei",
-                "email": "kwameo@yahoo.com",
-                "phone": "999-000-1111",
-                "username": "kwameo",
-            },
-            {
-                "id": "1057426",
-                "name": "Mei Lin",
-                "email": "meilin@gmail.com",
-                "phone": "333-444-5555",
-                "username": "mlin",
-            },
-        ]
-
-        self.orders = [
-            {
-                "id": "24601",
-                "customer_id": "1213210",
-                "product": "Wireless Headphones",
-                "quantity": 1,
-                "price": 79.99,
-                "status": "Shipped",
-            },
-            {
-                "id": "13579",
-                "customer_id": "1213210",
-                "product": "Smartphone Case",
-                "quantity": 2,
-                "price": 19.99,
-                "status": "Processing",
-            },
-            {
-                "id": "97531",
-                "customer_id": "2837622",
-                "product": "Bluetooth Speaker",
-                "quantity": 1,
-                "price": "49.99",
-                "status": "Shipped",
-            },
-            {
-                "id": "86420",
-                "customer_id": "3924156",
-                "product": "Fitness Tracker",
-                "quantity": 1,
-                "price": 129.99,
-                "status": "Delivered",
-            },
-            {
-                "id": "54321",
-                "customer_id": "4782901",
-                "product": "Laptop Sleeve",
-                "quantity": 3,
-                "price": 24.99,
-                "status": "Shipped",
-            },
-            {
-                "id": "19283",
-                "customer_id": "5190753",
-                "product": "Wireless Mouse",
-                "quantity": 1,
-                "price": 34.99,
-                "status": "Processing",
-            },
-            {
-                "id": "74651",
-                "customer_id": "6824095",
-                "product": "Gaming Keyboard",
-                "quantity": 1,
-                "price": 89.99,
-                "status": "Delivered",
-            },
-            {
-                "id": "30298",
-                "customer_id": "7135680",
-                "product": "Portable Charger",
-                "quantity": 2,
-                "price": 29.99,
-                "status": "Shipped",
-            },
-            {
-                "id": "47652",
-                "customer_id": "8259147",
-                "product": "Smartwatch",
-                "quantity": 1,
-                "price": 199.99,
-                "status": "Processing",
-            },
-            {
-                "id": "61984",
-                "customer_id": "9603481",
-                "product": "Noise-Cancelling Headphones",
-                "quantity": 1,
-                "price": 149.99,
-                "status": "Shipped",
-            },
-            {
-                "id": "58243",
-                "customer_id": "1057426",
-                "product": "Wireless Earbuds",
-                "quantity": 2,
-                "price": 99.99,
-                "status": "Delivered",
-            },
-            {
-                "id": "90357",
-                "customer_id": "1213210",
-                "product": "Smartphone Case",
-                "quantity": 1,
-                "price": 19.99,
-                "status": "Shipped",
-            },
-            {
-                "id": "28164",
-                "customer_id": "2837622",
-                "product": "Wireless Headphones",
-                "quantity": 2,
-                "price": 79.99,
-                "status": "Processing",
-            },
-        ]
+        self.customers = list(_CUSTOMERS)
+        self.orders = [Order(**row) for row in _ORDERS_RAW]
+
+        # Lookup indexes; they hold the same rows as the lists above, so
+        # changes like cancel_order show up through either
+        users_by = {
+            key: {getattr(customer, key): customer for customer in self.customers}
+            for key in _ALLOWED_KEYS
+        }
+        # One getter per lookup key, each bound straight to its own index
+        self.get_user_by_email = _user_getter("email", users_by["email"])
+        self.get_user_by_phone = _user_getter("phone", users_by["phone"])
+        self.get_user_by_username = _user_getter("username", users_by["username"])
+        self._user_getters = {
+            "email": self.get_user_by_email,
+            "phone": self.get_user_by_phone,
+            "username": self.get_user_by_username,
+        }
+        self._orders_by_id = {order.id: order for order in self.orders}
+        buckets = defaultdict(list)
+        for order in self.orders:
+            buckets[order.customer_id].append(order)
+        # Tuples can be handed out as-is; their rows still see status updates
+        self._orders_by_customer = {
+            customer_id: tuple(orders) for customer_id, orders in buckets.items()
+        }
+
+        # Column-per-field copy of orders for vectorized aggregation. Strings
+        # are object arrays so a status can be overwritten with any length.
+        self.orders_soa = {
+            field: np.array(
+                [getattr(order, field) for order in self.orders], dtype=object
+            )
+            for field in ("id", "customer_id", "product", "status")
+        }
+        self.orders_soa["quantity"] = np.array(
+            [order.quantity for order in self.orders], dtype=np.int64
+        )
+        self.orders_soa["price"] = np.array(
+            [order.price for order in self.orders], dtype=np.float64
+        )
+        # quantity and price never change after load, so the per-row
+        # revenue is computed once here rather than in every aggregation
+        self.orders_soa["line_total"] = (
+            self.orders_soa["quantity"] * self.orders_soa["price"]
+        )
+        self._order_pos = {order.id: i for i, order in enumerate(self.orders)}
 
     def get_user(self, key, value):
-        if key in {"email", "phone", "username"}:
-            for customer in self.customers:
-                if customer[key] == value:
-                    return customer
-            return f"Couldn't find a user with {key} of {value}"
-        else:
+        getter = self._user_getters.get(key)
+        if getter is None:
             raise ValueError(f"Invalid key: {key}")
-
-        return None
+        return getter(value)
 
     def get_order_by_id(self, order_id):
-        for order in self.orders:
-            if order["id"] == order_id:
-                return order
-        return None
+        return self._orders_by_id.get(order_id)
 
     def get_customer_orders(self, customer_id):
-        return [order for order in self.orders if order["customer_id"] == customer_id]
+        return self._orders_by_customer.get(customer_id, ())
 
     def cancel_order(self, order_id):
         order = self.get_order_by_id(order_id)
-        if order:
-            if order["status"] == "Processing":
-                order["status"] = "Cancelled"
-                return "Cancelled the order"
-            else:
-                return "Order has already shipped.  Can't cancel it."
-        return "Can't find that order!"
+        if order is None:
+            return "Can't find that order!"
+        if order.status != "Processing":
+            return _CANCEL_REFUSALS.get(order.status, _SHIPPED_REFUSAL)
+
+        order.status = "Cancelled"
+        self.orders_soa["status"][self._order_pos[order_id]] = "Cancelled"
+        return "Cancelled the order"
+
+    # Tool entry points: unpack the tool's input model. Rows are returned
+    # as-is; the tool cache JSON-encodes dataclasses and tuples directly.
+
+    def _exec_get_user_by_email(self, input):
+        return self.get_user_by_email(input.value)
+
+    def _exec_get_user_by_phone(self, input):
+        return self.get_user_by_phone(input.value)
+
+    def _exec_get_user_by_username(self, input):
+        return self.get_user_by_username(input.value)
+
+    def _exec_get_order(self, input):
+        return self.get_order_by_id(input.order_id)
+
+    def _exec_cancel_order(self, input):
+        return self.cancel_order(input.order_id)
+
+    def _exec_get_customer_orders(self, input):
+        return self.get_customer_orders(input.customer_id)
+
+    def _revenue_by(self, field):
+        """Sum of line totals per distinct value of field, in one bincount"""
+        groups, inverse = np.unique(self.orders_soa[field], return_inverse=True)
+        totals = np.bincount(inverse, weights=self.orders_soa["line_total"])
+        return dict(zip(groups.tolist(), totals.tolist()))
+
+    def revenue_by_product(self):
+        """Total quantity * price per product"""
+        return self._revenue_by("product")
+
+    def revenue_by_status(self):
+        """Total quantity * price per order status"""
+        return self._revenue_by("status")
 
 
 from standardbackend.tools.base import Tool
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
+# Tool inputs are frozen, so ToolCache can reuse the validated model for a
+# repeated payload
 class GetUserInput(BaseModel):
-    key: str
+    model_config = ConfigDict(frozen=True)
+
     value: str
 
 
 class GetOrderInput(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     order_id: str
 
 
 class CancelOrderInput(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     order_id: str
 
 
 class GetCustomerOrdersInput(BaseModel):
-    customer_id: str
-
-
-db = FakeDatabase()
-
+    model_config = ConfigDict(frozen=True)
 
-def fail_tool(input):
-    raise Exception("Not implemented")
+    customer_id: str
 
 
-tools = [
-    Tool(
-        name="get_user",
-        description="Get a user by their email, phone, or username",
-        input_schema=GetUserInput,
-        execute=lambda input: db.get_user(input.key, input.value),
+# (name, description, input schema, FakeDatabase method taking the tool input)
+_TOOL_SPECS = [
+    (
+        "get_user_by_email",
+        "Get a user by their email address",
+        GetUserInput,
+        FakeDatabase._exec_get_user_by_email,
+    ),
+    (
+        "get_user_by_phone",
+        "Get a user by their phone number",
+        GetUserInput,
+        FakeDatabase._exec_get_user_by_phone,
+    ),
+    (
+        "get_user_by_username",
+        "Get a user by their username",
+        GetUserInput,
+        FakeDatabase._exec_get_user_by_username,
     ),
-    Tool(
-        name="get_order",
-        description="Get an order by its ID",
-        input_schema=GetOrderInput,
-        execute=lambda input: db.get_order_by_id(input.order_id),
+    (
+        "get_order",
+        "Get an order by its ID",
+        GetOrderInput,
+        FakeDatabase._exec_get_order,
     ),
-    Tool(
-        name="cancel_order",
-        description="Cancel an order by its ID",
-        input_schema=CancelOrderInput,
-        execute=lambda input: db.cancel_order(input.order_id),
+    (
+        "cancel_order",
+        "Cancel an order by its ID",
+        CancelOrderInput,
+        FakeDatabase._exec_cancel_order,
     ),
-    Tool(
-        name="get_customer_orders",
-        description="Get all orders for a customer by their ID",
-        input_schema=GetCustomerOrdersInput,
-        execute=lambda input: db.get_customer_orders(input.customer_id),
+    (
+        "get_customer_orders",
+        "Get all orders for a customer by their ID",
+        GetCustomerOrdersInput,
+        FakeDatabase._exec_get_customer_orders,
     ),
 ]
 
@@ -300,43 +456,75 @@ class GetDesktopFilesInput(BaseModel):
     pass
 
 
+_DESKTOP_PATH = os.fspath(Path.home() / "Desktop")
+_NO_DESKTOP_ERR = {"error": "desktop not found", "path": _DESKTOP_PATH}
+
+
 def get_desktop_files():
-    desktop_path = os.path.join(Path.home(), "Desktop")
+    """Desktop file names plus a count per extension, from one directory pass"""
+    files = []
+    counts = Counter()
     try:
-        files = os.listdir(desktop_path)
-        return {"files": files, "path": desktop_path}
-    except Exception as e:
-        return {"error": str(e)}
-
-
-tools.append(
-    Tool(
-        name="get_desktop_files",
-        description="Get a list of all files on the user's desktop",
-        input_schema=GetDesktopFilesInput,
-        execute=lambda input: get_desktop_files(),
+        with os.scandir(_DESKTOP_PATH) as entries:
+            for entry in entries:
+                files.append(entry.name)
+                _, ext = os.path.splitext(entry.name)
+                counts[ext.lower() or "<none>"] += 1
+    except FileNotFoundError:
+        return _NO_DESKTOP_ERR
+    except PermissionError as e:
+        return {"error": "permission denied", "errno": e.errno}
+    except OSError as e:
+        return {"error": e.strerror, "errno": e.errno}
+    return {"files": files, "counts_by_ext": dict(counts), "path": _DESKTOP_PATH}
+
+
+@cache
+def get_tools() -> List[Tool]:
+    """The demo's tools, built (with their FakeDatabase) on first use"""
+    db = FakeDatabase()
+    tools = [
+        Tool(
+            name=name,
+            description=description,
+            input_schema=input_schema,
+            execute=partial(call, db),
+        )
+        for name, description, input_schema, call in _TOOL_SPECS
+    ]
+
+    tools.append(
+        Tool(
+            name="get_desktop_files",
+            description="Get a list of all files on the user's desktop",
+            input_schema=GetDesktopFilesInput,
+            execute=lambda input: get_desktop_files(),
+        )
     )
-)
 
-# also make it able to run python scripts
-tools.append(python_tool)
+    # also make it able to run python scripts
+    tools.append(python_tool)
+    return tools
 
-# t = Thread(
-#     tools=tools,
-#     model=ClaudeModels.Sonnet,
-# )
-# messages = t.send_message("hey, what model are you?")
-# # messages = t.send_message(
-# #     "hey so i have a warp drive that can accelerate to 2x the speed of sound. what would be its kinetic energy if it weighted 10kg? use python"
-# # )
-# pretty_print_messages(messages)
+
+if __name__ == "__main__":
+    _configure_logging()
+    # t = Thread(
+    #     tools=get_tools(),
+    #     model=ClaudeModels.Sonnet,
+    # )
+    # messages = t.send_message("hey, what model are you?")
+    # # messages = t.send_message(
+    # #     "hey so i have a warp drive that can accelerate to 2x the speed of sound. what would be its kinetic energy if it weighted 10kg? use python"
+    # # )
+    # pretty_print_messages(messages)
 
 # # Example usage of Terminal
 # if __name__ == "__main__":
 #     from standardbackend.terminal import Terminal
 
 #     # Create a terminal with the tools we defined
-#     terminal = Terminal(tools=tools)
+#     terminal = Terminal(tools=get_tools())
 
 #     # Start the interactive session
 #     terminal.start()
@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from typing import List
 import os
 import json
+from functools import lru_cache
 from anthropic import Anthropic
 
 # First, let's add our Pydantic models
@@ -33,9 +34,14 @@ class TaskPlan(BaseModel):
     execution_strategy: ExecutionStrategy
     action_patterns: List[ActionPattern]
 
+@lru_cache(maxsize=4)
+def _client(api_key: str) -> Anthropic:
+    """Reuse one client (and its connection pool) per API key"""
+    return Anthropic(api_key=api_key)
+
 # Now let's fix the generate_task_plan function
 def generate_task_plan(api_key: str, task_description: str) -> TaskPlan:
-    client = Anthropic(api_key=api_key)
+    client = _client(api_key)
     
     task_plan_schema = TaskPlan.model_json_schema()
     
@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional, Any, Dict
 
+# Placeholder that reserves a thread id while its Thread is being built
+_PENDING = object()
+
 
 class AgentInterface(ABC):
     @abstractmethod
@@ -32,16 +35,21 @@ class AnthropicAgent(AgentInterface):
     def create_thread(self, thread_id: str) -> None:
         from standardbackend.helpers.thread import Thread
 
-        if thread_id in self.threads:
+        if self.threads.setdefault(thread_id, _PENDING) is not _PENDING:
             raise ValueError(f"Thread {thread_id} already exists")
 
-        self.threads[thread_id] = Thread(tools=self.tools, agent=self.agent)
+        try:
+            self.threads[thread_id] = Thread(tools=self.tools, agent=self.agent)
+        except Exception:
+            del self.threads[thread_id]
+            raise
 
     def send_message(self, message: str, thread_id: str) -> List[Dict[str, Any]]:
-        if thread_id not in self.threads:
+        thread = self.threads.get(thread_id)
+        if thread is None or thread is _PENDING:
             raise ValueError(f"Thread {thread_id} not found")
 
-        return self.threads[thread_id].send_message(message)
+        return thread.send_message(message)
 
     def get_system_prompt(self) -> str:
         return self.agent.prompt
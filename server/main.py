@@ -1,49 +1,129 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from cachetools import LRUCache
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List, Dict, Any, Type
 from thread_backend import ThreadBackend
 from pydantic import create_model
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 backend = ThreadBackend()
+logger = logging.getLogger(__name__)
+
+# Field types accepted in tool input schemas (python and JSON schema names)
+_TYPE_MAP: Dict[str, type] = {
+    "str": str,
+    "string": str,
+    "int": int,
+    "integer": int,
+    "float": float,
+    "number": float,
+    "bool": bool,
+    "boolean": bool,
+    "list": list,
+    "array": list,
+    "dict": dict,
+    "object": dict,
+}
+
+# Schema models keyed by a hash of their canonical properties JSON. Schemas
+# come from clients, so only the most recently used are kept.
+_MODEL_CACHE: LRUCache = LRUCache(maxsize=256)
+
+
+def _schema_model_for(schema: Dict[str, Any]) -> Type[BaseModel]:
+    """Build (or reuse) the pydantic model for a tool's input schema"""
+    properties = schema.get("properties", {})
+    if not isinstance(properties, dict) or not all(
+        isinstance(field_info, dict) for field_info in properties.values()
+    ):
+        raise HTTPException(status_code=400, detail="Malformed input_schema")
+
+    key = hashlib.blake2b(
+        json.dumps(properties, sort_keys=True).encode()
+    ).hexdigest()
+    model = _MODEL_CACHE.get(key)
+    if model is not None:
+        return model
+
+    fields = {}
+    for field_name, field_info in properties.items():
+        type_name = field_info.get("type", "str")
+        # A list of types is valid JSON Schema, but not one we can map
+        if not isinstance(type_name, str) or type_name not in _TYPE_MAP:
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported field type: {type_name}"
+            )
+        fields[field_name] = (_TYPE_MAP[type_name], ...)
+
+    model = create_model("DynamicSchema", **fields)
+    _MODEL_CACHE[key] = model
+    return model
+
+
+class RequestModel(BaseModel):
+    """Base for request bodies: immutable, and unknown fields are dropped"""
 
+    model_config = ConfigDict(frozen=True, extra="ignore")
 
-class CreateAgentRequest(BaseModel):
+
+class CreateAgentRequest(RequestModel):
     name: str
     system_prompt: str
 
 
-class UpdateAgentRequest(BaseModel):
+class UpdateAgentRequest(RequestModel):
     name: Optional[str] = None
     system_prompt: Optional[str] = None
 
 
-class CreateThreadRequest(BaseModel):
+class CreateThreadRequest(RequestModel):
     agent_id: str
     title: str
 
 
-class AddMessageRequest(BaseModel):
+class AddMessageRequest(RequestModel):
     content: str
     agent_id: Optional[str] = None
 
 
-class CreateToolRequest(BaseModel):
+class BulkAddMessageItem(AddMessageRequest):
+    thread_id: str
+
+
+class BulkAddMessageRequest(RequestModel):
+    items: List[BulkAddMessageItem]
+
+
+class CreateToolRequest(RequestModel):
     name: str
     description: str
     input_schema: Dict[str, Any]
 
 
-class UpdateToolRequest(BaseModel):
+class UpdateToolRequest(RequestModel):
     name: Optional[str] = None
     description: Optional[str] = None
     input_schema: Optional[Dict[str, Any]] = None
 
 
-class AssignToolRequest(BaseModel):
+class AssignToolRequest(RequestModel):
     tool_id: str
 
 
+def _is_empty(content: str) -> bool:
+    """Messages with no visible text are answered without calling the agent"""
+    if content.strip():
+        return False
+    logger.info("Rejected empty message without calling the agent")
+    return True
+
+
 @app.post("/agents")
 async def create_agent(request: CreateAgentRequest):
     agent = backend.create_agent(request.name, request.system_prompt)
@@ -70,6 +150,8 @@ async def create_thread(request: CreateThreadRequest):
 
 @app.post("/threads/{thread_id}/messages")
 async def add_message(thread_id: str, request: AddMessageRequest):
+    if _is_empty(request.content):
+        raise HTTPException(status_code=400, detail="Message content is empty")
     try:
         message = backend.add_message(thread_id, request.content, request.agent_id)
         return message
@@ -77,6 +159,36 @@ async def add_message(thread_id: str, request: AddMessageRequest):
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@app.post("/threads/messages:bulk")
+async def add_messages_bulk(request: BulkAddMessageRequest):
+    """Add messages to several threads at once.
+
+    Different threads are processed concurrently, while messages for the same
+    thread keep their relative order. Results come back in request order, with
+    failed items reported as {"index", "error"}.
+    """
+    results: List[Any] = [None] * len(request.items)
+    by_thread: Dict[str, List[int]] = defaultdict(list)
+    for index, item in enumerate(request.items):
+        by_thread[item.thread_id].append(index)
+
+    async def run_thread(indices: List[int]):
+        for index in indices:
+            item = request.items[index]
+            if _is_empty(item.content):
+                results[index] = {"index": index, "error": "Message content is empty"}
+                continue
+            try:
+                results[index] = await asyncio.to_thread(
+                    backend.add_message, item.thread_id, item.content, item.agent_id
+                )
+            except Exception as e:
+                results[index] = {"index": index, "error": str(e)}
+
+    await asyncio.gather(*(run_thread(indices) for indices in by_thread.values()))
+    return results
+
+
 @app.get("/threads/{thread_id}/messages")
 async def get_thread_messages(thread_id: str):
     try:
@@ -88,15 +200,7 @@ async def get_thread_messages(thread_id: str):
 
 @app.post("/tools")
 async def create_tool(request: CreateToolRequest):
-    schema_model = create_model(
-        "DynamicSchema",
-        **{
-            field_name: (eval(field_info.get("type", "str")), ...)
-            for field_name, field_info in request.input_schema.get(
-                "properties", {}
-            ).items()
-        },
-    )
+    schema_model = _schema_model_for(request.input_schema)
     tool = backend.create_tool(request.name, request.description, schema_model)
     return tool
 
@@ -106,15 +210,7 @@ async def update_tool(tool_id: str, request: UpdateToolRequest):
     try:
         schema_model = None
         if request.input_schema:
-            schema_model = create_model(
-                "DynamicSchema",
-                **{
-                    field_name: (eval(field_info.get("type", "str")), ...)
-                    for field_name, field_info in request.input_schema.get(
-                        "properties", {}
-                    ).items()
-                },
-            )
+            schema_model = _schema_model_for(request.input_schema)
         tool = backend.update_tool(
             tool_id, request.name, request.description, schema_model
         )
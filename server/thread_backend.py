@@ -1,24 +1,107 @@
-from typing import Dict, List, Optional, Type, Any, Callable
+from typing import Deque, Dict, List, Optional, Tuple, Type, Any, Callable
+from collections import deque
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+import logging
+import os
+import threading
 import uuid
-from sqlalchemy import create_engine, Column, String, DateTime, ForeignKey, JSON
-from sqlalchemy.orm import declarative_base, Session, relationship
+import orjson
+from cachetools import LRUCache
+from sqlalchemy import (
+    create_engine,
+    make_url,
+    event,
+    inspect,
+    select,
+    text,
+    update,
+    Column,
+    String,
+    DateTime,
+    ForeignKey,
+    Index,
+    JSON,
+    Text,
+    TypeDecorator,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import declarative_base, relationship, sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 from pydantic import BaseModel
 from agent_interface import AgentInterface, AnthropicAgent
 
 Base = declarative_base()
+logger = logging.getLogger(__name__)
+
+
+_ID_BATCH = 256
+_id_lock = threading.Lock()
+_id_pool: List[str] = []
+
+
+def _new_id() -> str:
+    """uuid4 hex, drawn from a pool filled by one os.urandom call per batch"""
+    with _id_lock:
+        if not _id_pool:
+            raw = os.urandom(16 * _ID_BATCH)
+            _id_pool.extend(
+                uuid.UUID(bytes=raw[i : i + 16], version=4).hex
+                for i in range(0, len(raw), 16)
+            )
+        return _id_pool.pop()
+
+
+def _utcnow() -> datetime:
+    """Naive UTC timestamp, matching what SQLite hands back on reads"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+_stamp_lock = threading.Lock()
+_last_stamp = datetime.min
+
+
+def _monotonic_utcnow() -> datetime:
+    """_utcnow, but strictly increasing across calls in this process.
+
+    Rows inserted in one flush can otherwise share a timestamp; this keeps
+    created_at in insertion order, so it alone orders a thread's messages.
+    """
+    global _last_stamp
+    with _stamp_lock:
+        now = _utcnow()
+        if now <= _last_stamp:
+            now = _last_stamp + timedelta(microseconds=1)
+        _last_stamp = now
+        return now
+
+
+class ORJSON(TypeDecorator):
+    """JSON stored as text, encoded and decoded with orjson"""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else orjson.dumps(value).decode()
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else orjson.loads(value)
 
 
 class AgentModel(Base):
     __tablename__ = "agents"
 
-    id = Column(String, primary_key=True)
+    id = Column(String(32), primary_key=True, default=_new_id)
     name = Column(String, nullable=False)
     system_prompt = Column(String, nullable=False)
-    created_at = Column(DateTime, nullable=False)
-    updated_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=_utcnow)
+    updated_at = Column(DateTime, nullable=False, default=_utcnow, onupdate=_utcnow)
 
     threads = relationship("ThreadModel", back_populates="agent")
     tools = relationship("ToolModel", secondary="agent_tools", back_populates="agents")
@@ -27,38 +110,45 @@ class AgentModel(Base):
 class ThreadModel(Base):
     __tablename__ = "threads"
 
-    id = Column(String, primary_key=True)
+    id = Column(String(32), primary_key=True, default=_new_id)
     agent_id = Column(String, ForeignKey("agents.id"), nullable=False)
     title = Column(String, nullable=False)
-    created_at = Column(DateTime, nullable=False)
-    updated_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=_utcnow)
+    updated_at = Column(DateTime, nullable=False, default=_utcnow, onupdate=_utcnow)
 
     agent = relationship("AgentModel", back_populates="threads")
     messages = relationship("MessageModel", back_populates="thread")
 
+    __table_args__ = (Index("ix_threads_agent_updated", "agent_id", "updated_at"),)
+
 
 class MessageModel(Base):
     __tablename__ = "messages"
 
-    id = Column(String, primary_key=True)
+    id = Column(String(32), primary_key=True, default=_new_id)
     thread_id = Column(String, ForeignKey("threads.id"), nullable=False)
     agent_id = Column(String, ForeignKey("agents.id"), nullable=True)
+    # Plain text, or a short preview when the structured blocks are kept in
+    # content_json
     content = Column(String, nullable=False)
-    created_at = Column(DateTime, nullable=False)
+    content_json = Column(ORJSON, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=_monotonic_utcnow)
 
     thread = relationship("ThreadModel", back_populates="messages")
     agent = relationship("AgentModel")
 
+    __table_args__ = (Index("ix_messages_thread_created", "thread_id", "created_at"),)
+
 
 class ToolModel(Base):
     __tablename__ = "tools"
 
-    id = Column(String, primary_key=True)
+    id = Column(String(32), primary_key=True, default=_new_id)
     name = Column(String, nullable=False)
     description = Column(String, nullable=False)
     input_schema = Column(JSON, nullable=False)  # Store schema as JSON
-    created_at = Column(DateTime, nullable=False)
-    updated_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=_utcnow)
+    updated_at = Column(DateTime, nullable=False, default=_utcnow, onupdate=_utcnow)
 
     # Optional: Add relationship to agents if you want to track which agents can use which tools
     agents = relationship("AgentModel", secondary="agent_tools")
@@ -70,7 +160,7 @@ class AgentToolModel(Base):
 
     agent_id = Column(String, ForeignKey("agents.id"), primary_key=True)
     tool_id = Column(String, ForeignKey("tools.id"), primary_key=True)
-    created_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=_utcnow)
 
 
 # Keep the dataclass models for API responses
@@ -119,6 +209,7 @@ class Message:
     agent_id: Optional[str]
     content: str
     created_at: datetime
+    content_json: Optional[Any] = None
 
     @classmethod
     def from_db(cls, db_model: MessageModel) -> "Message":
@@ -128,6 +219,7 @@ class Message:
             agent_id=db_model.agent_id,
             content=db_model.content,
             created_at=db_model.created_at,
+            content_json=db_model.content_json,
         )
 
 
@@ -152,37 +244,203 @@ class Tool:
         )
 
 
+# Columns in dataclass field order; list endpoints build responses straight
+# from these rows instead of hydrating ORM objects
+_AGENT_COLUMNS = (
+    AgentModel.id,
+    AgentModel.name,
+    AgentModel.system_prompt,
+    AgentModel.created_at,
+    AgentModel.updated_at,
+)
+_MESSAGE_COLUMNS = (
+    MessageModel.id,
+    MessageModel.thread_id,
+    MessageModel.agent_id,
+    MessageModel.content,
+    MessageModel.created_at,
+    MessageModel.content_json,
+)
+_THREAD_COLUMNS = (
+    ThreadModel.id,
+    ThreadModel.agent_id,
+    ThreadModel.title,
+    ThreadModel.created_at,
+    ThreadModel.updated_at,
+)
+_TOOL_COLUMNS = (
+    ToolModel.id,
+    ToolModel.name,
+    ToolModel.description,
+    ToolModel.input_schema,
+    ToolModel.created_at,
+    ToolModel.updated_at,
+)
+
+
+@lru_cache(maxsize=128)
+def _schema_for(input_schema: Type[BaseModel]) -> Dict[str, Any]:
+    """JSON schema of a tool input model; generated once per class"""
+    return input_schema.model_json_schema()
+
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+_CONFLICT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+def _exists(session: Session, model: Type[Base], id: str) -> bool:
+    """Check for a row by primary key without loading its columns"""
+    return session.execute(select(1).where(model.id == id)).scalar() is not None
+
+
+def _set_sqlite_pragma(dbapi_conn, _connection_record) -> None:
+    """WAL with NORMAL sync: commits no longer fsync the main database file.
+
+    Foreign keys are enforced so writes can rely on them for existence checks.
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+
+def _content_preview(blocks: List[Dict[str, Any]], limit: int = 500) -> str:
+    """Short text rendering of structured content blocks"""
+    parts = []
+    for block in blocks:
+        block_type = block.get("type")
+        if block_type == "text":
+            parts.append(block.get("text", ""))
+        elif block_type == "tool_use":
+            parts.append(f"[tool_use: {block.get('name')}]")
+        elif block_type == "tool_result":
+            parts.append(f"[tool_result] {block.get('content', '')}")
+        else:
+            parts.append(f"[{block_type}]")
+    return "\n".join(parts)[:limit]
+
+
+def _turn_replies(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the messages that follow the latest user text message.
+
+    Agents hand back the whole conversation; everything after the user's
+    plain-text message (assistant turns and tool results) belongs to the
+    current turn.
+    """
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if message["role"] == "user" and isinstance(message["content"], str):
+            return messages[index + 1 :]
+    return messages
+
+
+def _is_memory_db(url) -> bool:
+    database = url.database or ""
+    return database in ("", ":memory:") or url.query.get("mode") == "memory"
+
+
+def _serialized(session_factory, lock: threading.Lock):
+    """Session factory that holds lock for the whole life of each session"""
+
+    @contextmanager
+    def session():
+        with lock, session_factory() as s:
+            yield s
+
+    return session
+
+
 class ThreadBackend:
     def __init__(self, db_url: str = "sqlite:///threads.db"):
+        url = make_url(db_url)
+        is_sqlite = url.get_backend_name() == "sqlite"
+        # An in-memory database only exists on its one connection, so it
+        # keeps StaticPool and sessions take turns on it (see below). Files
+        # use the default pool: one connection per thread, and WAL lets
+        # readers run alongside the writer.
+        shared_connection = is_sqlite and _is_memory_db(url)
+        engine_args: Dict[str, Any] = {}
+        if is_sqlite:
+            engine_args["connect_args"] = {"check_same_thread": False, "timeout": 30}
+        if shared_connection:
+            engine_args["poolclass"] = StaticPool
         self.engine = create_engine(
-            db_url, connect_args={"check_same_thread": False}, poolclass=StaticPool
+            url, query_cache_size=1200, pool_pre_ping=True, **engine_args
         )
+        if is_sqlite:
+            event.listen(self.engine, "connect", _set_sqlite_pragma)
         Base.metadata.create_all(self.engine)
+        self._add_missing_schema()
+        # Objects stay readable after commit, so from_db() needs no refetch
+        self.Session = sessionmaker(
+            bind=self.engine, expire_on_commit=False, autoflush=False
+        )
+        if shared_connection:
+            self.Session = _serialized(self.Session, threading.Lock())
         self.agent_implementations: Dict[str, AgentInterface] = {}
 
+        # Agents, tools and threads are read on almost every request but
+        # rarely change; keep recent ones in memory, written through on
+        # create/update
+        self._cache_lock = threading.Lock()
+        self._agent_cache: LRUCache = LRUCache(maxsize=256)
+        self._tool_cache: LRUCache = LRUCache(maxsize=256)
+        self._thread_cache: LRUCache = LRUCache(maxsize=1024)
+
+        # Agent replies run off the request path
+        self._executor = ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="agent-reply"
+        )
+        # A Thread's history is not safe to extend concurrently, so each
+        # conversation replies one message at a time, in order. While a reply
+        # runs, later messages wait here (thread id -> (agent id, content))
+        # without holding a worker; the entry is dropped once drained.
+        self._pending_replies: Dict[str, Deque[Tuple[str, str]]] = {}
+        self._pending_replies_lock = threading.Lock()
+
+    def _add_missing_schema(self) -> None:
+        """Add columns and indexes introduced after a database was first created.
+
+        create_all() skips tables that already exist, so it never adds these.
+        """
+        columns = {c["name"] for c in inspect(self.engine).get_columns("messages")}
+        with self.engine.begin() as connection:
+            if "content_json" not in columns:
+                connection.execute(
+                    text("ALTER TABLE messages ADD COLUMN content_json TEXT")
+                )
+            for table in (ThreadModel.__table__, MessageModel.__table__):
+                for index in table.indexes:
+                    index.create(connection, checkfirst=True)
+
+    def _cache_get(self, cache: LRUCache, key: str) -> Any:
+        with self._cache_lock:
+            return cache.get(key)
+
+    def _cache_put(self, cache: LRUCache, key: str, value: Any) -> None:
+        with self._cache_lock:
+            cache[key] = value
+
     def create_agent(
         self, name: str, system_prompt: str, tools: Optional[List] = None
     ) -> Agent:
-        with Session(self.engine) as session:
-            now = datetime.utcnow()
-            agent_id = str(uuid.uuid4())
-
-            db_agent = AgentModel(
-                id=agent_id,
-                name=name,
-                system_prompt=system_prompt,
-                created_at=now,
-                updated_at=now,
-            )
+        with self.Session() as session:
+            db_agent = AgentModel(name=name, system_prompt=system_prompt)
             session.add(db_agent)
             session.commit()
+            agent_id = db_agent.id
 
             # Create the implementation
             self.agent_implementations[agent_id] = AnthropicAgent(
                 name=name, system_prompt=system_prompt, tools=tools
             )
 
-            return Agent.from_db(db_agent)
+            agent = Agent.from_db(db_agent)
+        self._cache_put(self._agent_cache, agent_id, agent)
+        return agent
 
     def update_agent(
         self,
@@ -190,35 +448,36 @@ class ThreadBackend:
         name: Optional[str] = None,
         system_prompt: Optional[str] = None,
     ) -> Agent:
-        with Session(self.engine) as session:
-            db_agent = session.query(AgentModel).filter_by(id=agent_id).first()
-            if not db_agent:
+        values = {}
+        if name is not None:
+            values["name"] = name
+        if system_prompt is not None:
+            values["system_prompt"] = system_prompt
+
+        # A single UPDATE ... RETURNING; no row back means no such agent
+        with self.Session() as session:
+            row = session.execute(
+                update(AgentModel)
+                .where(AgentModel.id == agent_id)
+                .values(**values)
+                .returning(*_AGENT_COLUMNS)
+            ).first()
+            if row is None:
                 raise ValueError(f"Agent {agent_id} not found")
-
-            if name is not None:
-                db_agent.name = name
-            if system_prompt is not None:
-                db_agent.system_prompt = system_prompt
-
-            db_agent.updated_at = datetime.utcnow()
             session.commit()
-            return Agent.from_db(db_agent)
+            agent = Agent(*row)
+        self._cache_put(self._agent_cache, agent_id, agent)
+        return agent
 
     def create_thread(self, agent_id: str, title: str) -> Thread:
-        with Session(self.engine) as session:
-            if not session.query(AgentModel).filter_by(id=agent_id).first():
+        with self.Session() as session:
+            if not _exists(session, AgentModel, agent_id):
                 raise ValueError(f"Agent {agent_id} not found")
 
-            now = datetime.utcnow()
-            thread_id = str(uuid.uuid4())
-            db_thread = ThreadModel(
-                id=thread_id,
-                agent_id=agent_id,
-                title=title,
-                created_at=now,
-                updated_at=now,
-            )
+            db_thread = ThreadModel(agent_id=agent_id, title=title)
             session.add(db_thread)
+            session.flush()
+            thread_id = db_thread.id
 
             # Create the thread in the agent implementation
             agent_impl = self.agent_implementations.get(agent_id)
@@ -226,136 +485,206 @@ class ThreadBackend:
                 agent_impl.create_thread(thread_id)
 
             session.commit()
-            return Thread.from_db(db_thread)
+            thread = Thread.from_db(db_thread)
+        self._cache_put(self._thread_cache, thread_id, thread)
+        return thread
 
     def add_message(
         self, thread_id: str, content: str, agent_id: Optional[str] = None
     ) -> Message:
-        with Session(self.engine) as session:
-            thread = session.query(ThreadModel).filter_by(id=thread_id).first()
-            if not thread:
-                raise ValueError(f"Thread {thread_id} not found")
-
+        thread = self.get_thread(thread_id)
+        with self.Session() as session:
             # If this is a user message
             if agent_id is None:
                 db_message = MessageModel(
-                    id=str(uuid.uuid4()),
-                    thread_id=thread_id,
-                    agent_id=None,
-                    content=content,
-                    created_at=datetime.utcnow(),
+                    thread_id=thread_id, agent_id=None, content=content
                 )
                 session.add(db_message)
                 session.commit()
                 user_message = Message.from_db(db_message)
 
-                # Get agent response
-                agent_impl = self.agent_implementations.get(thread.agent_id)
-                if agent_impl:
-                    messages = agent_impl.send_message(content, thread_id)
-                    # Store the last message from the agent
-                    if messages:
-                        last_message = messages[-1]
-                        if isinstance(last_message.get("content"), list):
-                            # Handle structured content (like tool uses)
-                            content = str(last_message["content"])
-                        else:
-                            content = last_message.get("content", "")
-
-                        db_message = MessageModel(
-                            id=str(uuid.uuid4()),
-                            thread_id=thread_id,
-                            agent_id=thread.agent_id,
-                            content=content,
-                            created_at=datetime.utcnow(),
-                        )
-                        session.add(db_message)
-                        session.commit()
+                # The agent replies in the background; its messages show up
+                # in get_thread_messages once they are stored
+                if thread.agent_id in self.agent_implementations:
+                    self._queue_reply(thread_id, thread.agent_id, content)
 
                 return user_message
 
             # If this is an agent message
-            if not session.query(AgentModel).filter_by(id=agent_id).first():
+            if not _exists(session, AgentModel, agent_id):
                 raise ValueError(f"Agent {agent_id} not found")
 
             db_message = MessageModel(
-                id=str(uuid.uuid4()),
-                thread_id=thread_id,
-                agent_id=agent_id,
-                content=content,
-                created_at=datetime.utcnow(),
+                thread_id=thread_id, agent_id=agent_id, content=content
             )
             session.add(db_message)
             session.commit()
             return Message.from_db(db_message)
 
+    def _queue_reply(self, thread_id: str, agent_id: str, content: str) -> None:
+        """Start the reply now, or after the replies already queued for the thread"""
+        with self._pending_replies_lock:
+            pending = self._pending_replies.get(thread_id)
+            if pending is not None:
+                pending.append((agent_id, content))
+                return
+            self._pending_replies[thread_id] = deque()
+        self._start_reply(thread_id, agent_id, content)
+
+    def _start_reply(self, thread_id: str, agent_id: str, content: str) -> None:
+        future = self._executor.submit(
+            self._finalize_assistant_reply, thread_id, agent_id, content
+        )
+        future.add_done_callback(lambda _: self._next_reply(thread_id))
+
+    def _next_reply(self, thread_id: str) -> None:
+        """Start the thread's next queued reply, if any"""
+        with self._pending_replies_lock:
+            pending = self._pending_replies[thread_id]
+            if not pending:
+                del self._pending_replies[thread_id]
+                return
+            agent_id, content = pending.popleft()
+        self._start_reply(thread_id, agent_id, content)
+
+    def _finalize_assistant_reply(
+        self, thread_id: str, agent_id: str, content: str
+    ) -> None:
+        """Get the agent's reply to a user message and store it"""
+        try:
+            messages = self.agent_implementations[agent_id].send_message(
+                content, thread_id
+            )
+        except Exception:
+            logger.exception(f"Agent {agent_id} failed to reply in {thread_id}")
+            return
+
+        rows = []
+        for reply in _turn_replies(messages):
+            reply_content = reply.get("content", "")
+            content_json = None
+            if isinstance(reply_content, list):
+                # Keep structured content (like tool uses) as JSON
+                content_json = reply_content
+                reply_content = _content_preview(reply_content)
+
+            rows.append(
+                MessageModel(
+                    thread_id=thread_id,
+                    agent_id=agent_id,
+                    content=reply_content,
+                    content_json=content_json,
+                )
+            )
+
+        # Every reply row from this turn is written in a single commit
+        with self.Session() as session:
+            session.add_all(rows)
+            session.commit()
+
     def get_thread_messages(self, thread_id: str) -> List[Message]:
-        with Session(self.engine) as session:
-            if not session.query(ThreadModel).filter_by(id=thread_id).first():
+        with self.Session() as session:
+            rows = session.execute(
+                select(*_MESSAGE_COLUMNS)
+                .where(MessageModel.thread_id == thread_id)
+                .order_by(MessageModel.created_at)
+            ).all()
+            # Only an empty result needs a second query to tell "no messages"
+            # apart from "no thread"
+            if not rows and not _exists(session, ThreadModel, thread_id):
                 raise ValueError(f"Thread {thread_id} not found")
-
-            messages = session.query(MessageModel).filter_by(thread_id=thread_id).all()
-            return [Message.from_db(msg) for msg in messages]
+            return [Message(*row) for row in rows]
 
     def get_agent(self, agent_id: str) -> Agent:
-        with Session(self.engine) as session:
-            db_agent = session.query(AgentModel).filter_by(id=agent_id).first()
+        agent = self._cache_get(self._agent_cache, agent_id)
+        if agent is not None:
+            return agent
+
+        with self.Session() as session:
+            db_agent = session.get(AgentModel, agent_id)
             if not db_agent:
                 raise ValueError(f"Agent {agent_id} not found")
-            return Agent.from_db(db_agent)
+            agent = Agent.from_db(db_agent)
+        self._cache_put(self._agent_cache, agent_id, agent)
+        return agent
 
     def get_thread(self, thread_id: str) -> Thread:
-        with Session(self.engine) as session:
-            db_thread = session.query(ThreadModel).filter_by(id=thread_id).first()
+        thread = self._cache_get(self._thread_cache, thread_id)
+        if thread is not None:
+            return thread
+
+        with self.Session() as session:
+            db_thread = session.get(ThreadModel, thread_id)
             if not db_thread:
                 raise ValueError(f"Thread {thread_id} not found")
-            return Thread.from_db(db_thread)
+            thread = Thread.from_db(db_thread)
+        self._cache_put(self._thread_cache, thread_id, thread)
+        return thread
 
     def create_tool(
         self, name: str, description: str, input_schema: Type[BaseModel]
     ) -> Tool:
-        with Session(self.engine) as session:
-            now = datetime.utcnow()
+        with self.Session() as session:
             db_tool = ToolModel(
-                id=str(uuid.uuid4()),
                 name=name,
                 description=description,
-                input_schema=input_schema.model_json_schema(),
-                created_at=now,
-                updated_at=now,
+                input_schema=_schema_for(input_schema),
             )
             session.add(db_tool)
             session.commit()
-            return Tool.from_db(db_tool)
+            tool = Tool.from_db(db_tool)
+        self._cache_put(self._tool_cache, tool.id, tool)
+        return tool
 
     def assign_tool_to_agent(self, agent_id: str, tool_id: str) -> None:
-        with Session(self.engine) as session:
-            if not session.query(AgentModel).filter_by(id=agent_id).first():
-                raise ValueError(f"Agent {agent_id} not found")
-            if not session.query(ToolModel).filter_by(id=tool_id).first():
-                raise ValueError(f"Tool {tool_id} not found")
-
-            agent_tool = AgentToolModel(
-                agent_id=agent_id,
-                tool_id=tool_id,
-                created_at=datetime.utcnow(),
-            )
-            session.add(agent_tool)
-            session.commit()
+        conflict_insert = _CONFLICT_INSERTS.get(self.engine.dialect.name)
+        with self.Session() as session:
+            try:
+                if conflict_insert is not None:
+                    # One statement: re-assigning is a no-op and the foreign
+                    # keys reject unknown agents or tools
+                    session.execute(
+                        conflict_insert(AgentToolModel)
+                        .values(agent_id=agent_id, tool_id=tool_id)
+                        .on_conflict_do_nothing(index_elements=["agent_id", "tool_id"])
+                    )
+                else:
+                    if not _exists(session, AgentModel, agent_id) or not _exists(
+                        session, ToolModel, tool_id
+                    ):
+                        raise ValueError(
+                            f"Agent {agent_id} or Tool {tool_id} not found"
+                        )
+                    if session.get(AgentToolModel, (agent_id, tool_id)) is None:
+                        session.add(AgentToolModel(agent_id=agent_id, tool_id=tool_id))
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                raise ValueError(f"Agent {agent_id} or Tool {tool_id} not found")
 
     def get_agent_tools(self, agent_id: str) -> List[Tool]:
-        with Session(self.engine) as session:
-            agent = session.query(AgentModel).filter_by(id=agent_id).first()
-            if not agent:
+        with self.Session() as session:
+            rows = session.execute(
+                select(*_TOOL_COLUMNS)
+                .join(AgentToolModel, AgentToolModel.tool_id == ToolModel.id)
+                .where(AgentToolModel.agent_id == agent_id)
+            ).all()
+            if not rows and not _exists(session, AgentModel, agent_id):
                 raise ValueError(f"Agent {agent_id} not found")
-            return [Tool.from_db(tool) for tool in agent.tools]
+            return [Tool(*row) for row in rows]
 
     def get_tool(self, tool_id: str) -> Tool:
-        with Session(self.engine) as session:
-            db_tool = session.query(ToolModel).filter_by(id=tool_id).first()
+        tool = self._cache_get(self._tool_cache, tool_id)
+        if tool is not None:
+            return tool
+
+        with self.Session() as session:
+            db_tool = session.get(ToolModel, tool_id)
             if not db_tool:
                 raise ValueError(f"Tool {tool_id} not found")
-            return Tool.from_db(db_tool)
+            tool = Tool.from_db(db_tool)
+        self._cache_put(self._tool_cache, tool_id, tool)
+        return tool
 
     def update_tool(
         self,
@@ -364,26 +693,35 @@ class ThreadBackend:
         description: Optional[str] = None,
         input_schema: Optional[Type[BaseModel]] = None,
     ) -> Tool:
-        with Session(self.engine) as session:
-            db_tool = session.query(ToolModel).filter_by(id=tool_id).first()
-            if not db_tool:
+        values = {}
+        if name is not None:
+            values["name"] = name
+        if description is not None:
+            values["description"] = description
+        if input_schema is not None:
+            values["input_schema"] = _schema_for(input_schema)
+
+        with self.Session() as session:
+            row = session.execute(
+                update(ToolModel)
+                .where(ToolModel.id == tool_id)
+                .values(**values)
+                .returning(*_TOOL_COLUMNS)
+            ).first()
+            if row is None:
                 raise ValueError(f"Tool {tool_id} not found")
-
-            if name is not None:
-                db_tool.name = name
-            if description is not None:
-                db_tool.description = description
-            if input_schema is not None:
-                db_tool.input_schema = input_schema.model_json_schema()
-
-            db_tool.updated_at = datetime.utcnow()
             session.commit()
-            return Tool.from_db(db_tool)
+            tool = Tool(*row)
+        self._cache_put(self._tool_cache, tool_id, tool)
+        return tool
 
     def get_agent_threads(self, agent_id: str) -> List[Thread]:
-        with Session(self.engine) as session:
-            if not session.query(AgentModel).filter_by(id=agent_id).first():
+        with self.Session() as session:
+            rows = session.execute(
+                select(*_THREAD_COLUMNS)
+                .where(ThreadModel.agent_id == agent_id)
+                .order_by(ThreadModel.updated_at.desc())
+            ).all()
+            if not rows and not _exists(session, AgentModel, agent_id):
                 raise ValueError(f"Agent {agent_id} not found")
-
-            threads = session.query(ThreadModel).filter_by(agent_id=agent_id).all()
-            return [Thread.from_db(thread) for thread in threads]
+            return [Thread(*row) for row in rows]
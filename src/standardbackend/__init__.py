@@ -3,7 +3,8 @@ def hello() -> str:
 
 
 from standardbackend.helpers.agent import Agent
+from standardbackend.helpers.response_cache import ResponseCache
 from standardbackend.helpers.thread import Thread
 from standardbackend.utils import pretty_print_messages
 
-__all__ = ["Agent", "Thread", "pretty_print_messages"]
+__all__ = ["Agent", "ResponseCache", "Thread", "pretty_print_messages"]
@@ -0,0 +1,78 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import orjson
+
+if TYPE_CHECKING:
+    from anthropic.types import Message
+
+
+class ResponseCache:
+    """SQLite-backed cache of Claude responses, keyed by the full request.
+
+    Identical requests (model, temperature, messages, tools, system...) are
+    answered from disk instead of hitting the API again. Entries older than
+    ttl seconds are ignored and deleted on the next put; ttl=None keeps them
+    forever.
+    """
+
+    def __init__(self, path: str = "responses.db", ttl: Optional[float] = None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response_json BLOB NOT NULL, ts REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_responses_ts ON responses (ts)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(request: Dict[str, Any]) -> str:
+        """Deterministic hash of the request arguments.
+
+        Encoded the same way as ToolCache's content keys.
+        """
+        encoded = orjson.dumps(
+            request,
+            default=str,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        )
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, request: Dict[str, Any]) -> Optional["Message"]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response_json, ts FROM responses WHERE key = ? LIMIT 1",
+                (self.key(request),),
+            ).fetchone()
+        if row is None:
+            return None
+        response_json, ts = row
+        if self.ttl is not None and time.time() - ts > self.ttl:
+            return None
+        from anthropic.types import Message
+
+        return Message.model_validate_json(response_json)
+
+    def put(self, request: Dict[str, Any], message: "Message") -> None:
+        # Only fields the API actually sent, so a replayed message converts
+        # back into the same history (and the same follow-up keys)
+        response_json = message.model_dump_json(exclude_unset=True)
+        now = time.time()
+        with self._lock:
+            if self.ttl is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE ts < ?", (now - self.ttl,)
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response_json, ts) "
+                "VALUES (?, ?, ?)",
+                (self.key(request), response_json, now),
+            )
+            self._conn.commit()
@@ -1,19 +1,112 @@
-from anthropic import Anthropic, AsyncAnthropic
 import os
+import json
 import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from standardbackend.tools import ExecutionStatus, ToolCache
-from standardbackend.tools.python_code_runner import tools as python_tools
 import asyncio
-from typing import AsyncGenerator, Union, Dict, Any
-
-from dotenv import load_dotenv
-
-# Just load the .env file by default
-load_dotenv()
+from typing import AsyncGenerator, Union, Dict, Any, List
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# anthropic, httpx and dotenv are imported on first use rather than at import
+# time, so importing the package stays cheap
+
+
+@lru_cache(maxsize=1)
+def _ensure_env():
+    """Load the .env file by default, once, when the first Thread is created"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+@lru_cache(maxsize=1)
+def _http_limits():
+    """Keep-alive pool settings shared by the Anthropic clients"""
+    import httpx
+
+    return httpx.Limits(
+        max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0
+    )
+
+
+@lru_cache(maxsize=1)
+def _http2_available():
+    """HTTP/2 lets concurrent streams share one connection; httpx needs h2 for it"""
+    import importlib.util
+
+    return importlib.util.find_spec("h2") is not None
+
+
+@lru_cache(maxsize=1)
+def _block_adapter():
+    """Serializer for a whole list of content blocks, built once"""
+    from anthropic.types import ContentBlock
+    from pydantic import TypeAdapter
+
+    return TypeAdapter(List[ContentBlock])
+
+
+@lru_cache(maxsize=4)
+def _client(api_key):
+    """Anthropic client shared by every Thread using the same key.
+
+    The SDK client is thread-safe, so sharing it lets threads reuse warm
+    keep-alive connections instead of paying a TLS handshake each.
+    """
+    from anthropic import Anthropic, DefaultHttpxClient
+
+    return Anthropic(
+        api_key=api_key,
+        max_retries=2,
+        http_client=DefaultHttpxClient(limits=_http_limits()),
+    )
+
+
+# Async clients per event loop, then per API key. Their connections belong to
+# the loop that opened them, so they can't be shared across loops, but every
+# Thread streaming on the same loop reuses one. Clients of closed loops are
+# dropped when the next one is created.
+_aclients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_aclients_lock = threading.Lock()
+
+
+def _aclient(api_key):
+    """Async Anthropic client shared by every Thread on the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _aclients_lock:
+        clients = _aclients.get(loop)
+        if clients is None:
+            for other in [other for other in _aclients if other.is_closed()]:
+                del _aclients[other]
+            clients = _aclients[loop] = {}
+        client = clients.get(api_key)
+        if client is None:
+            from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+            client = clients[api_key] = AsyncAnthropic(
+                api_key=api_key,
+                max_retries=2,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=_http_limits(), http2=_http2_available()
+                ),
+            )
+        return client
+
+
+@lru_cache(maxsize=1)
+def _tool_pool():
+    """Thread pool shared by every Thread for running tool calls side by side.
+
+    One pool for the process keeps the number of worker threads bounded no
+    matter how many conversations are alive.
+    """
+    return ThreadPoolExecutor(max_workers=32, thread_name_prefix="tool-call")
+
 
 class Thread:
     """Represents a conversation thread with Claude that can use tools"""
@@ -27,9 +120,21 @@ class Thread:
         agent=None,
         on_text_callback=None,
         on_tool_use_callback=None,
+        max_history_messages=None,
+        client=None,
+        aclient=None,
+        response_cache=None,
+        cache_tool_results=False,
     ):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        self.tool_cache = ToolCache(tools) if tools else None
+        _ensure_env()
+        # Callers that manage their own client (e.g. a daemon) can pass it in
+        self.client = client or _client(os.getenv("ANTHROPIC_API_KEY"))
+        self._aclient = aclient  # async client for send_message_stream
+        self.tool_cache = (
+            ToolCache(tools, cache_by_input=cache_tool_results) if tools else None
+        )
+        # Optional ResponseCache; identical requests are replayed from it
+        self.response_cache = response_cache
         self.messages = []
         self.model = model
         self.temperature = temperature
@@ -39,6 +144,11 @@ class Thread:
         self.tools = tools
         self.agent = agent
 
+        # Older turns beyond max_history_messages are folded into a summary
+        self.max_history_messages = max_history_messages
+        self._summary = None
+        self._summarized_upto = 0
+
     def _handle_text_output(self, block):
         """Handle text output from Claude with optional callback"""
         if self.on_text_callback is not None:
@@ -84,29 +194,116 @@ class Thread:
             ],
         }
 
+    def _get_aclient(self):
+        """Async client passed to the Thread, or the one shared on this loop"""
+        if self._aclient is not None:
+            return self._aclient
+        return _aclient(os.getenv("ANTHROPIC_API_KEY"))
+
+    def _handle_block(self, block, metadata, pending_tools):
+        """Handle one finished content block, starting the tool it calls if any"""
+        if block.type == "text":
+            self._handle_text_output(block)
+        elif block.type == "tool_use":
+            self._handle_tool_callback(block)
+            metadata["tools_called"].append(block.id)
+            pending_tools.append(_tool_pool().submit(self._execute_tool, block))
+        else:
+            raise ValueError(f"Unexpected message type: {block.type}")
+
     def _parse_message(self, message):
         """Parse Claude's message and handle any tool calls"""
         metadata = {"tools_called": []}
-        tool_responses = []
+        pending_tools = []
 
         for block in message.content:
-            if block.type == "text":
-                self._handle_text_output(block)
-            elif block.type == "tool_use":
-                self._handle_tool_callback(block)
-                metadata["tools_called"].append(block.id)
-                tool_responses.append(self._execute_tool(block))
-            else:
-                raise ValueError(f"Unexpected message type: {block.type}")
+            self._handle_block(block, metadata, pending_tools)
 
+        # Tools run concurrently; responses keep the order of the blocks
+        tool_responses = [future.result() for future in pending_tools]
         return metadata, tool_responses
 
     def _blocks_to_dict(self, blocks):
-        """Converts TextBlock and ToolUseBlock to dicts"""
-        t = []
-        for block in blocks:
-            t.append(block.to_dict())
-        return t
+        """Converts TextBlock and ToolUseBlock to dicts, in one pass over the list"""
+        # Same options as the SDK's block.to_dict()
+        return _block_adapter().dump_python(blocks, exclude_unset=True, by_alias=True)
+
+    def _summarize(self, messages):
+        """Ask Claude for a short summary of earlier turns (and any previous summary)"""
+        transcript = "\n".join(
+            f"{m['role']}: {m['content']}"
+            if isinstance(m["content"], str)
+            else f"{m['role']}: {json.dumps(m['content'], default=str)}"
+            for m in messages
+        )
+        previous = (
+            f"Summary so far:\n{self._summary}\n\n" if self._summary else ""
+        )
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            temperature=0,
+            messages=[
+                {
+                    "role": "user",
+                    "content": f"{previous}Conversation:\n{transcript}\n\n"
+                    "Summarize the conversation above in a few sentences, keeping "
+                    "facts, decisions and tool results needed to continue it.",
+                }
+            ],
+        )
+        return "".join(b.text for b in response.content if b.type == "text")
+
+    def _history(self):
+        """Messages to send this turn, summarizing older ones past the window"""
+        limit = self.max_history_messages
+        if limit is None or len(self.messages) - self._summarized_upto <= limit:
+            return self.messages[self._summarized_upto :]
+
+        # Only cut where a user text turn starts, so tool_use / tool_result
+        # pairs are never split
+        for cut in range(len(self.messages) - limit, len(self.messages)):
+            message = self.messages[cut]
+            if message["role"] == "user" and isinstance(message["content"], str):
+                break
+        else:
+            return self.messages[self._summarized_upto :]
+
+        if cut > self._summarized_upto:
+            self._summary = self._summarize(self.messages[self._summarized_upto : cut])
+            self._summarized_upto = cut
+        return self.messages[self._summarized_upto :]
+
+    def _system_args(self, context):
+        """System blocks; the agent's context is marked cacheable as a stable prefix"""
+        blocks = []
+        if context:
+            blocks.append(
+                {
+                    "type": "text",
+                    "text": context,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            )
+        if self._summary:
+            blocks.append(
+                {
+                    "type": "text",
+                    "text": f"Summary of the earlier conversation:\n{self._summary}",
+                }
+            )
+        return {"system": blocks} if blocks else {}
+
+    def _base_args(self):
+        """Request arguments that stay the same for every turn of a send"""
+        base_args = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
+        if self.tools:
+            base_args["tools"] = self.tool_cache.tool_specs
+        return base_args
 
     def add_message(self, role: str, content: str):
         """Add a message to the conversation"""
@@ -123,39 +320,44 @@ class Thread:
         """
         self.add_message("user", message)
 
-        while True:
-            tool_args = (
-                {
-                    "tools": self.tool_cache.tool_specs,
-                    "tool_choice": {"type": tool_mode},
-                }
-                if self.tools
-                else {}
-            )
+        base_args = self._base_args()
+        # The agent's context doesn't change between tool rounds of one send
+        context = self.agent.get_current_context() if self.agent else None
 
-            model_args = {
-                "model": self.model,
-                "max_tokens": self.max_tokens,
-                "temperature": self.temperature,
+        while True:
+            message_args = {
+                **base_args,
+                "messages": self._history(),
+                **self._system_args(context),
             }
+            if self.tools:
+                message_args["tool_choice"] = {"type": tool_mode}
 
-            system_prompt = (
-                {
-                    "system": self.agent.get_current_context(),
-                }
-                if self.agent
-                else {}
+            claude_message = (
+                self.response_cache.get(message_args) if self.response_cache else None
             )
+            if claude_message is not None:
+                metadata, tool_responses = self._parse_message(claude_message)
+            else:
+                metadata = {"tools_called": []}
+                pending_tools = []
 
-            message_args = {
-                "messages": self.messages,
-                **model_args,
-                **tool_args,
-                **system_prompt,
-            }
+                # Handle blocks as soon as they are complete, so tools run while
+                # Claude is still generating the rest of the message
+                with self.client.messages.stream(**message_args) as stream:
+                    for event in stream:
+                        if event.type == "content_block_stop":
+                            self._handle_block(
+                                event.content_block, metadata, pending_tools
+                            )
+                    claude_message = stream.get_final_message()
+
+                if self.response_cache:
+                    self.response_cache.put(message_args, claude_message)
+
+                # Tools run concurrently; responses keep the order of the blocks
+                tool_responses = [future.result() for future in pending_tools]
 
-            claude_message = self.client.messages.create(**message_args)
-            metadata, tool_responses = self._parse_message(claude_message)
             self.add_message("assistant", self._blocks_to_dict(claude_message.content))
             self.messages.extend(tool_responses)
 
@@ -179,56 +381,48 @@ class Thread:
         """
         self.add_message("user", message)
 
-        while True:
-            tool_args = (
-                {
-                    "tools": self.tool_cache.tool_specs,
-                    "tool_choice": {"type": tool_mode},
-                }
-                if self.tools
-                else {}
-            )
-
-            model_args = {
-                "model": self.model,
-                "max_tokens": self.max_tokens,
-                "temperature": self.temperature,
-            }
-
-            system_prompt = (
-                {
-                    "system": self.agent.get_current_context(),
-                }
-                if self.agent
-                else {}
-            )
+        base_args = self._base_args()
+        # The agent's context doesn't change between tool rounds of one send
+        context = self.agent.get_current_context() if self.agent else None
 
+        while True:
             message_args = {
-                "messages": self.messages,
-                **model_args,
-                **tool_args,
-                **system_prompt,
+                **base_args,
+                "messages": await asyncio.to_thread(self._history),
+                **self._system_args(context),
             }
-
-            async with self.client.messages.stream(**message_args) as stream:
-                message_content = []
-                async for message_delta in stream:
-                    for block in message_delta.content:
+            if self.tools:
+                message_args["tool_choice"] = {"type": tool_mode}
+
+            tool_tasks = []
+
+            # Text is yielded as it arrives; tools start in worker threads as
+            # soon as their block is complete so the event loop stays free
+            async with self._get_aclient().messages.stream(**message_args) as stream:
+                async for event in stream:
+                    # Raw deltas carry only the new text, not the snapshot
+                    if event.type == "content_block_delta":
+                        if event.delta.type == "text_delta":
+                            yield event.delta.text
+                    elif event.type == "content_block_stop":
+                        block = event.content_block
                         if block.type == "text":
-                            if self.on_text_callback is not None:
-                                self.on_text_callback(block)
-                            yield block.text
-                            message_content.append(block)
+                            self._handle_text_output(block)
                         elif block.type == "tool_use":
-                            if self.on_tool_use_callback is not None:
-                                self.on_tool_use_callback(block)
-                            tool_response = self._execute_tool(block)
-                            yield {"tool_result": tool_response}
-                            self.messages.append(tool_response)
-                            message_content.append(block)
-
-                self.add_message("assistant", message_content)
-
-                if stream.stop_reason != "tool_use":
-                    break
-                tool_mode = "auto"  # Switch to auto mode for follow-up messages
+                            self._handle_tool_callback(block)
+                            tool_tasks.append(
+                                asyncio.create_task(
+                                    asyncio.to_thread(self._execute_tool, block)
+                                )
+                            )
+                claude_message = await stream.get_final_message()
+
+            self.add_message("assistant", self._blocks_to_dict(claude_message.content))
+            for task in tool_tasks:
+                tool_response = await task
+                yield {"tool_result": tool_response}
+                self.messages.append(tool_response)
+
+            if claude_message.stop_reason != "tool_use":
+                break
+            tool_mode = "auto"  # Switch to auto mode for follow-up messages
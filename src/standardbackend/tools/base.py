@@ -1,5 +1,5 @@
 from typing import Optional, List, Dict, Any, Type, Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pydantic import BaseModel
 
 
@@ -9,10 +9,17 @@ class Tool:
     description: str
     input_schema: Type[BaseModel]
     execute: Optional[Callable] = None
+    # to_dict() result; building the JSON schema is slow, and every Thread
+    # using this tool asks for it
+    _spec: Optional[Dict[str, Any]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "name": self.name,
-            "description": self.description,
-            "input_schema": self.input_schema.model_json_schema(),
-        }
+        if self._spec is None:
+            self._spec = {
+                "name": self.name,
+                "description": self.description,
+                "input_schema": self.input_schema.model_json_schema(),
+            }
+        return self._spec
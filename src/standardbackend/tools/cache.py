@@ -1,10 +1,31 @@
+import hashlib
+import threading
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List, Optional
+from functools import cached_property, lru_cache
+from typing import Dict, List, Optional, Type
+
+import orjson
+from pydantic import BaseModel
 
 from standardbackend.tools.base import Tool
 
 
+_RESULT_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _encode_result(result) -> str:
+    """JSON-encode a tool's return value for the model.
+
+    Dicts, lists, tuples, dataclasses and numpy values go through orjson;
+    anything it can't encode falls back to str().
+    """
+    try:
+        return orjson.dumps(result, default=str, option=_RESULT_OPTIONS).decode()
+    except orjson.JSONEncodeError:
+        return str(result)
+
+
 class ExecutionStatus(Enum):
     """Status of a tool execution"""
 
@@ -23,24 +44,72 @@ class ExecutionResult:
     error: Optional[str] = None
 
 
+# Input values that can key the validation cache. Equal values of different
+# types (1, 1.0, True) validate differently, so the key carries each type.
+_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+@lru_cache(maxsize=128, typed=True)
+def _validate_frozen(schema: Type[BaseModel], items: tuple) -> BaseModel:
+    return schema(**{name: value for name, _, value in items})
+
+
+def _validate(schema: Type[BaseModel], input: dict) -> BaseModel:
+    """Validate tool input; frozen schemas reuse the model for a repeated payload.
+
+    Only frozen models are shared between calls, since nothing can change them.
+    Payloads with nested values (lists, dicts) are always validated afresh.
+    """
+    if schema.model_config.get("frozen") and all(
+        type(value) in _SCALAR_TYPES for value in input.values()
+    ):
+        items = tuple(
+            (name, type(value), value) for name, value in sorted(input.items())
+        )
+        return _validate_frozen(schema, items)
+    return schema(**input)
+
+
 class ToolCache:
     """A helper class that knows how to cache tool results"""
 
-    def __init__(self, tools: List[Tool]):
+    def __init__(self, tools: List[Tool], cache_by_input: bool = False):
         self.cache: Dict[str, ExecutionResult] = {}
+        # With cache_by_input, a repeated (tool, input) pair reuses the earlier
+        # successful result instead of running the tool again
+        self.cache_by_input = cache_by_input
+        self.result_by_content_key: Dict[str, ExecutionResult] = {}
+        # Tools of one message run in parallel; guards the check-then-mark
+        # below so an execution id never runs twice
+        self._lock = threading.Lock()
         self.tools = tools or []
         self.tool_name_to_tool = {tool.name: tool for tool in tools}
-        self.tool_specs = [tool.to_dict() for tool in tools]
+
+    @cached_property
+    def tool_specs(self) -> List[dict]:
+        """Tool definitions in the format the Anthropic API expects.
+
+        The last one carries a cache breakpoint, so the tools block is served
+        from the prompt cache on every turn after the first.
+        """
+        specs = [tool.to_dict() for tool in self.tools]
+        if specs:
+            # Copy: to_dict() hands out the tool's own memoized dict
+            specs[-1] = {**specs[-1], "cache_control": {"type": "ephemeral"}}
+        return specs
 
     def get(self, execution_id: str) -> Optional[ExecutionResult]:
         """Get the result of a tool execution by ID"""
-        ans = self.cache.get(execution_id)
-
-        # for now, make sure the result is a string!
-        if ans and ans.result:
-            ans.result = str(ans.result)
+        return self.cache.get(execution_id)
 
-        return ans
+    @staticmethod
+    def _content_key(tool_name: str, input: dict) -> str:
+        encoded = orjson.dumps(
+            {"tool": tool_name, "input": input},
+            default=str,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        )
+        return hashlib.sha256(encoded).hexdigest()
 
     def _lookup_tool(self, tool_name: str) -> Tool:
         """Lookup a tool by name"""
@@ -61,19 +130,29 @@ class ToolCache:
         Returns:
             ExecutionResult containing status and result/error
         """
-        if execution_id in self.cache:
-            return self.cache[execution_id]
+        content_key = (
+            self._content_key(tool_name, input) if self.cache_by_input else None
+        )
+
+        with self._lock:
+            if execution_id in self.cache:
+                return self.cache[execution_id]
+            if content_key in self.result_by_content_key:
+                self.cache[execution_id] = self.result_by_content_key[content_key]
+                return self.cache[execution_id]
 
-        try:
             # Mark as running
             self.cache[execution_id] = ExecutionResult(status=ExecutionStatus.RUNNING)
 
+        try:
             # Execute the tool
             real_tool = self._lookup_tool(tool_name)
-            formatted_input = real_tool.input_schema(**input)
+            formatted_input = _validate(real_tool.input_schema, input)
             result = real_tool.execute(formatted_input)
 
-            # Store successful result
+            # Store successful result; results are always kept as strings
+            if result is not None and not isinstance(result, str):
+                result = _encode_result(result)
             execution_result = ExecutionResult(
                 status=ExecutionStatus.COMPLETED, result=result
             )
@@ -85,4 +164,9 @@ class ToolCache:
             )
 
         self.cache[execution_id] = execution_result
+        if (
+            content_key is not None
+            and execution_result.status == ExecutionStatus.COMPLETED
+        ):
+            self.result_by_content_key[content_key] = execution_result
         return execution_result
@@ -1,9 +1,10 @@
 from typing import Optional, List
-import subprocess
-import tempfile
+import json
 import os
+import queue
 import signal
-from contextlib import contextmanager
+import subprocess
+import threading
 from pydantic import BaseModel
 
 from standardbackend.tools.base import Tool
@@ -15,21 +16,254 @@ class EvalInput(BaseModel):
     max_output_length: Optional[int] = 1000
 
 
-@contextmanager
-def timeout(seconds):
-    def signal_handler(signum, frame):
-        raise TimeoutError("Code execution timed out")
+# Runs inside each worker: one JSON request per line on a private copy of
+# stdin, one JSON reply per line on a private copy of stdout. Each request is
+# run in a forked child of this loop, so whatever the code changes (cwd,
+# environment, imports, builtins) dies with the child and the next request
+# starts from the same clean state, as a fresh interpreter would. The child's
+# fd 1 and 2 are pipes that this loop drains, which also catches output
+# written at the fd level (subprocesses, C extensions); once either passes the
+# limit the child is killed, so nothing piles up in memory or on disk.
+# Python-level output beyond the limit stops the code the same way.
+# Without fork (Windows) the code runs in this process, only its Python-level
+# output is captured, and the worker is discarded after the call instead.
+_DISPATCHER = r"""
+import io, json, linecache, os, select, signal, sys, traceback
+
+TRUNCATED_EXIT = 3
+
+class OutputLimitReached(BaseException):
+    pass
+
+class CappedWriter(io.TextIOBase):
+    running = False  # only stop the user's code, not our traceback printing
 
-    signal.signal(signal.SIGALRM, signal_handler)
-    signal.alarm(seconds)
+    def __init__(self, stream, limit):
+        self.stream, self.room, self.truncated = stream, limit, False
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        n = len(s)
+        if self.room is not None:
+            kept = s[: max(self.room, 0)]
+            self.room -= len(kept)
+            self.truncated = self.truncated or len(kept) < n
+            s = kept
+        self.stream.write(s)
+        if self.truncated and CappedWriter.running:
+            raise OutputLimitReached
+        return n
+
+    def flush(self):
+        self.stream.flush()
+
+def run(code, limit, out, err):
+    # Python's streams go through the capped writers onto out and err;
+    # returns whether output was cut off
+    stdout, stderr = CappedWriter(out, limit), CappedWriter(err, limit)
+    sys.stdout, sys.stderr = stdout, stderr
+    linecache.cache["<code>"] = (len(code), None, code.splitlines(True), "<code>")
+    CappedWriter.running = True
     try:
-        yield
-    finally:
-        signal.alarm(0)
+        exec(compile(code, "<code>", "exec"), {"__name__": "__main__"})
+    except (SystemExit, OutputLimitReached):
+        pass
+    except BaseException as e:
+        CappedWriter.running = False
+        # Drop this dispatcher's frame so the traceback starts in <code>
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+    CappedWriter.running = False
+    stdout.flush()
+    stderr.flush()
+    return stdout.truncated or stderr.truncated
+
+def drain(pid, fds, cap):
+    # Read the child's pipes until they close, keeping at most cap bytes of
+    # each; a pipe that reaches cap gets the child killed. Returns the
+    # decoded text per fd and whether the cap was hit.
+    parts = {fd: [] for fd in fds}
+    room = dict.fromkeys(fds, cap)
+    open_fds, over = list(fds), False
+    while open_fds and not over:
+        for fd in select.select(open_fds, [], [])[0]:
+            data = os.read(fd, 65536)
+            if not data:
+                open_fds.remove(fd)
+                continue
+            if cap is not None:
+                data = data[: room[fd]]
+                room[fd] -= len(data)
+                over = over or room[fd] == 0
+            parts[fd].append(data)
+    if over:
+        os.kill(pid, signal.SIGKILL)
+    for fd in fds:
+        os.close(fd)
+    text = {fd: b"".join(chunks).decode("utf-8", errors="replace") for fd, chunks in parts.items()}
+    return text, over
+
+def run_forked(code, limit):
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            for fd in (requests.fileno(), replies.fileno(), out_r, err_r):
+                os.close(fd)
+            os.dup2(out_w, 1)
+            os.dup2(err_w, 2)
+            os.close(out_w)
+            os.close(err_w)
+            out = open(1, "w", encoding="utf-8", buffering=1, closefd=False)
+            err = open(2, "w", encoding="utf-8", buffering=1, closefd=False)
+            status = TRUNCATED_EXIT if run(code, limit, out, err) else 0
+        finally:
+            os._exit(status)
+    os.close(out_w)
+    os.close(err_w)
+    # Past 4 bytes a character, the text is certainly over limit characters
+    cap = None if limit is None else 4 * limit + 4
+    text, over = drain(pid, [out_r, err_r], cap)
+    _, status = os.waitpid(pid, 0)
+    truncated = over or (
+        os.WIFEXITED(status) and os.WEXITSTATUS(status) == TRUNCATED_EXIT
+    )
+    return text[out_r] + text[err_r], truncated
+
+def run_in_process(code, limit):
+    out, err = io.StringIO(), io.StringIO()
+    truncated = run(code, limit, out, err)
+    return out.getvalue() + err.getvalue(), truncated
+
+requests = os.fdopen(os.dup(0), "r")
+replies = os.fdopen(os.dup(1), "w")
+devnull = os.open(os.devnull, os.O_RDWR)
+os.dup2(devnull, 0)
+os.dup2(devnull, 1)
+sys.stdin = open(os.devnull)
+
+for line in requests:
+    request = json.loads(line)
+    code, limit = request["code"], request["max_output_length"]
+    if hasattr(os, "fork"):
+        output, truncated = run_forked(code, limit)
+    else:
+        output, truncated = run_in_process(code, limit)
+    if limit is not None and len(output) > limit:
+        output, truncated = output[:limit], True
+    replies.write(json.dumps({"output": output, "truncated": truncated}) + "\n")
+    replies.flush()
+"""
+
+# Whether workers isolate calls from each other by forking; without it a
+# worker is only used once
+_FORK_ISOLATION = hasattr(os, "fork")
+
+MAX_IDLE_WORKERS = 8
+
+
+class PythonWorker:
+    """A long-lived python process that runs code sent to it, one call at a time.
+
+    Each call runs in a fork of the idle interpreter, so calls are as isolated
+    from each other as separate processes while startup is paid once.
+    """
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            ["python", "-u", "-c", _DISPATCHER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            # Own process group, so close() also reaches a running call
+            # and anything it started
+            start_new_session=_FORK_ISOLATION,
+        )
+        # Replies are read on a separate thread so run() can wait on them
+        # with a timeout on every platform (select() can't wait on pipes
+        # on Windows)
+        self._replies: queue.Queue = queue.Queue()
+        threading.Thread(target=self._read_replies, daemon=True).start()
+
+    def _read_replies(self):
+        for line in self.process.stdout:
+            self._replies.put(line)
+        self._replies.put(None)  # the worker exited
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(
+        self,
+        code: str,
+        timeout: Optional[float],
+        max_output_length: Optional[int] = None,
+    ) -> str:
+        """Run code and return its stdout followed by its stderr.
+
+        Output past max_output_length characters is cut off and marked.
+
+        Raises:
+            TimeoutError: If no reply arrives within timeout seconds
+            RuntimeError: If the worker process died
+        """
+        request = {"code": code, "max_output_length": max_output_length or None}
+        self.process.stdin.write(json.dumps(request) + "\n")
+        self.process.stdin.flush()
+
+        try:
+            line = self._replies.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("Code execution timed out")
+        if line is None:
+            raise RuntimeError("Python worker exited unexpectedly")
+
+        reply = json.loads(line)
+        if reply["truncated"]:
+            return reply["output"] + "\n...[truncated]"
+        return reply["output"]
+
+    def close(self):
+        if _FORK_ISOLATION:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.process.kill()
+        self.process.wait()
+
+
+_idle_workers: List[PythonWorker] = []
+_workers_lock = threading.Lock()
+
+
+def _acquire_worker() -> PythonWorker:
+    with _workers_lock:
+        while _idle_workers:
+            worker = _idle_workers.pop()
+            if worker.alive():
+                return worker
+    return PythonWorker()
+
+
+def _release_worker(worker: PythonWorker):
+    if not _FORK_ISOLATION:
+        # The call ran in the worker itself; don't hand its state to the next
+        worker.close()
+        return
+    with _workers_lock:
+        if len(_idle_workers) < MAX_IDLE_WORKERS:
+            _idle_workers.append(worker)
+            return
+    worker.close()
 
 
 def execute_python_code(input_data: EvalInput) -> str:
-    """Execute Python code in a temporary file with timeout and output limits.
+    """Execute Python code in a pooled worker process with timeout and output limits.
 
     Args:
         input_data (EvalInput): Contains code to execute, optional timeout and max output length
@@ -41,31 +275,20 @@ def execute_python_code(input_data: EvalInput) -> str:
         TimeoutError: If code execution exceeds timeout
         Exception: For any other execution errors
     """
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
-        f.write(input_data.code)
-        temp_file = f.name
-
+    worker = _acquire_worker()
     try:
-        with timeout(input_data.timeout):
-            result = subprocess.run(
-                ["python", temp_file],
-                capture_output=True,
-                text=True,
-                timeout=input_data.timeout,
-            )
-
-        output = result.stdout + result.stderr
-        if input_data.max_output_length:
-            output = output[: input_data.max_output_length]
-
-        return output
-
+        output = worker.run(
+            input_data.code, input_data.timeout, input_data.max_output_length
+        )
     except TimeoutError:
+        # The worker is stuck in the code; it can't be reused
+        worker.close()
         return "Code execution timed out"
     except Exception as e:
+        worker.close()
         return f"Error executing code: {str(e)}"
-    finally:
-        os.unlink(temp_file)
+    _release_worker(worker)
+    return output
 
 
 # export a default list of tools :)
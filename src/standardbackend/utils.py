@@ -1,6 +1,44 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _headers():
+    """Colored section headers, built once on first use"""
+    from termcolor import colored
+
+    return {
+        "user": colored("\n[User]", "green", attrs=["bold"]),
+        "assistant": colored("\n[Assistant]", "blue", attrs=["bold"]),
+        "tool_result": colored("\n[Tool Result]", "yellow", attrs=["bold"]),
+        "tool_use": colored("\n[Tool Use]", "magenta", attrs=["bold"]),
+    }
+
+
+def _print_tool_result(block, headers):
+    print(headers["tool_result"])
+    print(block["content"])
+
+
+def _print_text(block, headers):
+    print(block["text"])
+
+
+def _print_tool_use(block, headers):
+    print(headers["tool_use"])
+    print(f"Tool: {block['name']}")
+    print(f"Input: {block['input']}")
+
+
+_BLOCK_PRINTERS = {
+    "tool_result": _print_tool_result,
+    "text": _print_text,
+    "tool_use": _print_tool_use,
+}
+
+
 def pretty_print_messages(messages):
     """Pretty print conversation messages with color coding"""
-    from termcolor import colored
+    headers = _headers()
 
     for msg in messages:
         # Handle both dict and Message objects
@@ -12,38 +50,18 @@ def pretty_print_messages(messages):
             content = msg.content
 
         # Print role header
-        if role == "user":
-            print(colored(f"\n[User]", "green", attrs=["bold"]))
-        elif role == "assistant":
-            print(colored(f"\n[Assistant]", "blue", attrs=["bold"]))
+        if role in ("user", "assistant"):
+            print(headers[role])
 
         # Handle different content types
         if isinstance(content, str):
             # Simple text content
             print(content)
         elif isinstance(content, list):
-            # Complex content with blocks
+            # Complex content with blocks; typed blocks are read as dicts
             for block in content:
-                if isinstance(block, dict):
-                    # Tool result block
-                    if block["type"] == "tool_result":
-                        print(colored("\n[Tool Result]", "yellow", attrs=["bold"]))
-                        print(block["content"])
-                    # Message block from assistant
-                    elif block["type"] == "text":
-                        print(block["text"])
-                    elif block["type"] == "tool_use":
-                        print(colored("\n[Tool Use]", "magenta", attrs=["bold"]))
-                        print(f"Tool: {block['name']}")
-                        print(f"Input: {block['input']}")
-                else:
-                    # Handle typed blocks
-                    if block.type == "tool_result":
-                        print(colored("\n[Tool Result]", "yellow", attrs=["bold"]))
-                        print(block.content)
-                    elif block.type == "text":
-                        print(block.text)
-                    elif block.type == "tool_use":
-                        print(colored("\n[Tool Use]", "magenta", attrs=["bold"]))
-                        print(f"Tool: {block.name}")
-                        print(f"Input: {block.input}")
+                if not isinstance(block, dict):
+                    block = block.__dict__
+                printer = _BLOCK_PRINTERS.get(block["type"])
+                if printer is not None:
+                    printer(block, headers)